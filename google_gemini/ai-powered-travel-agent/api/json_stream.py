@@ -0,0 +1,61 @@
+# Data parsing
+from typing import List
+import orjson
+
+
+class JsonArrayStreamParser:
+    """
+    Incrementally extract the objects of a top-level JSON array from streamed text.
+
+    Text is fed in as it arrives and each object is returned as soon as its closing
+    brace is seen, without waiting for the rest of the array. `complete` is set once
+    the closing bracket of the array has been seen.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.position = 0
+        self.depth = 0
+        self.item_start = 0
+        self.in_string = False
+        self.escaped = False
+        self.complete = False
+
+    def feed(self, text: str) -> List[dict]:
+        """
+        Consume the next chunk of text and return any objects it completed.
+        """
+        self.buffer += text
+        items = []
+
+        for index in range(self.position, len(self.buffer)):
+            char = self.buffer[index]
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char == "{":
+                if self.depth == 0:
+                    self.item_start = index
+                self.depth += 1
+            elif char == "}":
+                self.depth -= 1
+                if self.depth == 0:
+                    items.append(orjson.loads(self.buffer[self.item_start:index + 1]))
+            elif char == "]" and self.depth == 0:
+                self.complete = True
+
+        # Keep only the unfinished object, if any
+        if self.depth == 0:
+            self.buffer = ""
+        else:
+            self.buffer = self.buffer[self.item_start:]
+            self.item_start = 0
+        self.position = len(self.buffer)
+
+        return items
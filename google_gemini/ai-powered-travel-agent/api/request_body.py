@@ -0,0 +1,119 @@
+# FastAPI dependencies
+from fastapi import HTTPException, Request
+from fastapi.exceptions import RequestValidationError
+
+# Data parsing
+from pydantic import BaseModel, ValidationError
+from typing import Any, Awaitable, Callable, Dict, Optional, Type
+import email.message
+import json
+
+
+def is_json_content_type(content_type: Optional[str], strict_content_type: bool) -> bool:
+    """
+    Check whether FastAPI would decode a body with this Content-Type as JSON.
+
+    Args:
+        content_type (Optional[str]): The request's Content-Type header, if any.
+        strict_content_type (bool): Whether a missing Content-Type is rejected rather than treated as JSON.
+
+    Returns:
+        bool: True for application/json and application/*+json, and for a missing header when not strict.
+    """
+    if not content_type:
+        return not strict_content_type
+    message = email.message.Message()
+    message["content-type"] = content_type
+    if message.get_content_maintype() != "application":
+        return False
+    subtype = message.get_content_subtype()
+    return subtype == "json" or subtype.endswith("+json")
+
+
+def validate_body(model: Type[BaseModel], body: bytes, parse_json: bool) -> BaseModel:
+    """
+    Parse and validate a request body exactly the way FastAPI does for a body parameter.
+
+    Args:
+        model (Type[BaseModel]): The request model to validate against.
+        body (bytes): The raw request body.
+        parse_json (bool): Whether the body is decoded as JSON or validated as raw bytes.
+
+    Returns:
+        BaseModel: The validated request.
+
+    Raises:
+        RequestValidationError: If the body is not valid JSON or does not match the model.
+        HTTPException: If the body cannot be decoded at all (e.g. invalid UTF-8).
+    """
+    value: Any = None
+    if body:
+        value = body
+        if parse_json:
+            try:
+                value = json.loads(body)
+            except json.JSONDecodeError as e:
+                raise RequestValidationError([{
+                    "type": "json_invalid",
+                    "loc": ("body", e.pos),
+                    "msg": "JSON decode error",
+                    "input": {},
+                    "ctx": {"error": e.msg},
+                }], body=e.doc) from e
+            except Exception as e:
+                raise HTTPException(status_code=400, detail="There was an error parsing the body") from e
+
+    # FastAPI reports an empty body or a JSON null as a missing required field
+    if value is None:
+        raise RequestValidationError([{"type": "missing", "loc": ("body",), "msg": "Field required", "input": None}])
+
+    try:
+        return model.model_validate(value, from_attributes=True)
+    except ValidationError as e:
+        raise RequestValidationError(
+            [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)],
+            body=value,
+        ) from e
+
+
+def json_body(model: Type[BaseModel], strict_content_type: bool = True) -> Callable[[Request], Awaitable[BaseModel]]:
+    """
+    Build a dependency that parses and validates a JSON request body in one step.
+
+    FastAPI normally decodes the body with the stdlib `json` module and then validates
+    the resulting dict. `model_validate_json` does both in pydantic-core instead. Bodies
+    it rejects are re-run through FastAPI's own decode-then-validate path, so anything
+    FastAPI accepts is still accepted and errors have the same shape.
+
+    Args:
+        model (Type[BaseModel]): The request model to validate against.
+        strict_content_type (bool): Mirrors FastAPI's option of the same name and default.
+
+    Returns:
+        Callable[[Request], Awaitable[BaseModel]]: The dependency to pass to `Depends`.
+    """
+    async def parse_body(request: Request) -> BaseModel:
+        body = await request.body()
+        parse_json = is_json_content_type(request.headers.get("content-type"), strict_content_type)
+        if body and parse_json:
+            try:
+                return model.model_validate_json(body)
+            except ValidationError:
+                # pydantic-core is stricter than the stdlib decoder (BOMs, UTF-16, lone
+                # surrogates) and reports JSON-mode messages, so take the slow path
+                pass
+        return validate_body(model, body, parse_json)
+
+    return parse_body
+
+
+def json_body_openapi(model: Type[BaseModel]) -> Dict[str, Any]:
+    """
+    Describe a `json_body` request model in the OpenAPI schema.
+    """
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": model.model_json_schema()}}
+        }
+    }
@@ -0,0 +1,92 @@
+import pytest
+
+from json_stream import JsonArrayStreamParser
+
+
+def feed_in_chunks(text: str, size: int):
+    """
+    Feed `text` to a new parser `size` characters at a time.
+    """
+    parser = JsonArrayStreamParser()
+    items = []
+    for start in range(0, len(text), size):
+        items.extend(parser.feed(text[start:start + size]))
+    return parser, items
+
+
+def test_whole_array():
+    parser, items = feed_in_chunks('[{"name": "Kyoto"}, {"name": "Nara"}]', 1000)
+
+    assert items == [{"name": "Kyoto"}, {"name": "Nara"}]
+    assert parser.complete
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7])
+def test_split_chunks(size):
+    text = '[{"name": "Kyoto", "attractions": ["Fushimi Inari", "Kinkaku-ji"]}, {"name": "Nara"}]'
+
+    parser, items = feed_in_chunks(text, size)
+
+    assert items == [
+        {"name": "Kyoto", "attractions": ["Fushimi Inari", "Kinkaku-ji"]},
+        {"name": "Nara"},
+    ]
+    assert parser.complete
+
+
+def test_objects_returned_as_soon_as_closed():
+    parser = JsonArrayStreamParser()
+
+    assert parser.feed('[{"name": "Ky') == []
+    assert parser.feed('oto"}, {"na') == [{"name": "Kyoto"}]
+    assert parser.feed('me": "Nara"}') == [{"name": "Nara"}]
+    assert not parser.complete
+    assert parser.feed("]") == []
+    assert parser.complete
+
+
+@pytest.mark.parametrize("size", [1, 1000])
+def test_nested_objects(size):
+    text = '[{"name": "Kyoto", "meta": {"rating": {"food": 5}, "tags": [{"a": 1}]}}]'
+
+    _, items = feed_in_chunks(text, size)
+
+    assert items == [{"name": "Kyoto", "meta": {"rating": {"food": 5}, "tags": [{"a": 1}]}}]
+
+
+@pytest.mark.parametrize("size", [1, 2, 1000])
+def test_braces_brackets_and_escapes_inside_strings(size):
+    text = r'[{"description": "Quote \" then } and { and ] and a backslash \\", "name": "A\"}"}]'
+
+    parser, items = feed_in_chunks(text, size)
+
+    assert items == [{"description": 'Quote " then } and { and ] and a backslash \\', "name": 'A"}'}]
+    assert parser.complete
+
+
+def test_escape_split_across_chunks():
+    parser = JsonArrayStreamParser()
+
+    assert parser.feed('[{"name": "a\\') == []
+    assert parser.feed('"}"}]') == [{"name": 'a"}'}]
+    assert parser.complete
+
+
+def test_unicode_escapes():
+    _, items = feed_in_chunks('[{"name": "Z\\u00fcrich", "city": "東京"}]', 3)
+
+    assert items == [{"name": "Zürich", "city": "東京"}]
+
+
+def test_truncated_stream_is_not_complete():
+    parser, items = feed_in_chunks('[{"name": "Kyoto"}, {"name": "Na', 4)
+
+    assert items == [{"name": "Kyoto"}]
+    assert not parser.complete
+
+
+def test_empty_array():
+    parser, items = feed_in_chunks("[]", 1)
+
+    assert items == []
+    assert parser.complete
@@ -0,0 +1,69 @@
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+from typing import List, Optional
+
+from request_body import json_body
+
+
+class LocationRequest(BaseModel):
+    """
+    Same shape as main.LocationRequest, which cannot be imported without Gemini credentials.
+    """
+    location: str
+    preferences: Optional[List[str]] = []
+
+
+def describe(request: LocationRequest):
+    """
+    Echo the request with `ascii`, since lone surrogates cannot be encoded in a response.
+    """
+    return {"location": ascii(request.location), "preferences": request.preferences}
+
+
+app = FastAPI()
+
+
+@app.post("/plain")
+async def plain(request: LocationRequest):
+    return describe(request)
+
+
+@app.post("/json-body")
+async def parsed(request: LocationRequest = Depends(json_body(LocationRequest))):
+    return describe(request)
+
+
+client = TestClient(app)
+
+JSON = {"content-type": "application/json"}
+
+
+@pytest.mark.parametrize("content, headers", [
+    (b'{"location": "Paris", "preferences": ["food"]}', JSON),
+    (b'{"location": "Paris"}', {"content-type": "application/vnd.api+json; charset=utf-8"}),
+    (b'\xef\xbb\xbf{"location": "Paris"}', JSON),
+    ('{"location": "Paris"}'.encode("utf-16"), JSON),
+    (b'{"location": "\\ud800"}', JSON),
+    (b'{"location": "Paris"', JSON),
+    (b'\xff\xfe\xfd', JSON),
+    (b'', JSON),
+    (b'null', JSON),
+    (b'[1]', JSON),
+    (b'{}', JSON),
+    (b'{"location": "Paris", "preferences": "beach"}', JSON),
+    (b'{"location": "Paris"}', {"content-type": "text/plain"}),
+    (b'{"location": "Paris"}', {}),
+    (b'location=Paris', {"content-type": "application/x-www-form-urlencoded"}),
+])
+def test_matches_fastapi(content, headers):
+    expected = client.post("/plain", content=content, headers=headers)
+    actual = client.post("/json-body", content=content, headers=headers)
+
+    assert actual.status_code == expected.status_code
+    assert actual.json() == expected.json()
@@ -1,8 +1,10 @@
 from google import genai
 from dotenv import load_dotenv
-from pprint import pprint
+import os
 
-load_dotenv()
+# Only read the .env file when the key isn't already set in the environment
+if not os.getenv("GEMINI_API_KEY"):
+    load_dotenv()
 
 # The client gets the API key from the environment variable `GEMINI_API_KEY`.
 client = genai.Client()
@@ -10,5 +12,4 @@ client = genai.Client()
 response = client.models.generate_content(
     model="gemini-3-flash-preview", contents="Explain about Agentic AI?"
 )
-pprint(response.text)
-
+print(response.text)